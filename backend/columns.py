@@ -1,10 +1,11 @@
 import os, re, json, hashlib
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
 
 # Where we persist mappings (relative to project root)
 PROFILE_PATH = os.path.join(os.path.dirname(__file__), "..", "column_profiles.json")
 
-DEFAULT_PATTERNS = {
+_RAW_PATTERNS = {
     "brand":   [r"^brand$", r"^brand\s*name$", r"\bbrand\b"],
     "chain":   [r"^ret(ailer)?$", r"^banner$", r"^chain$", r"row\s*labels", r"\bret.*label", r"\bbanner", r"\bchain"],
     "units":   [r"\bunits?\b", r"\bsum\s*of\s*units?\b", r"units.*4w", r"4w.*units"],
@@ -13,55 +14,96 @@ DEFAULT_PATTERNS = {
     "acv":     [r"\bacv\b", r"\bacv\s*weighted\b", r"\b%?\s*acv\b", r"tdp.*acv", r"weighted\s*dist"],
 }
 
+# Compiled once at import; the patterns are static.
+DEFAULT_PATTERNS: Dict[str, List[Pattern]] = {
+    field: [re.compile(p, re.IGNORECASE) for p in pats]
+    for field, pats in _RAW_PATTERNS.items()
+}
+
+# One alternation per field so each column is scanned once to see if it matches anything.
+COMBINED_PATTERNS: Dict[str, Pattern] = {
+    field: re.compile("|".join(f"(?:{p})" for p in pats), re.IGNORECASE)
+    for field, pats in _RAW_PATTERNS.items()
+}
+
+_WS_RE = re.compile(r"\s+")
+
 def _norm(s: str) -> str:
-    return re.sub(r"\s+", " ", s.strip().lower())
+    return _WS_RE.sub(" ", s.strip().lower())
 
-def _match_one(colnames: List[str], patterns: List[str]) -> Optional[str]:
-    for pat in patterns:
-        rx = re.compile(pat, re.IGNORECASE)
-        for c in colnames:
+def _match_one(colnames: List[str], patterns: List[Pattern], combined: Pattern) -> Optional[str]:
+    # Single pass with the alternation to find candidates; pattern order still decides
+    # the winner, so only fall back to the ordered scan when several columns hit.
+    hits = [c for c in colnames if combined.search(c)]
+    if len(hits) <= 1:
+        return hits[0] if hits else None
+    for rx in patterns:
+        for c in hits:
             if rx.search(c):
                 return c
     return None
 
-def _sha1_name(name: str) -> str:
-    return hashlib.sha1(name.encode("utf-8")).hexdigest()
+# Parsed profiles, reused until the file's mtime changes
+_CACHE: Dict = {"mtime": 0.0, "data": None}
 
 def load_profiles() -> Dict:
-    if os.path.exists(PROFILE_PATH):
-        with open(PROFILE_PATH, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except Exception:
-                return {}
-    return {}
+    try:
+        mtime = os.path.getmtime(PROFILE_PATH)
+    except OSError:
+        return {}
+    if _CACHE["data"] is not None and _CACHE["mtime"] == mtime:
+        return _CACHE["data"]
+    with open(PROFILE_PATH, "r", encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except Exception:
+            data = {}
+    _CACHE["mtime"], _CACHE["data"] = mtime, data
+    return data
 
 def save_profiles(profiles: Dict) -> None:
     with open(PROFILE_PATH, "w", encoding="utf-8") as f:
         json.dump(profiles, f, indent=2)
+    _CACHE["mtime"], _CACHE["data"] = os.path.getmtime(PROFILE_PATH), profiles
 
-def suggest_mapping(headers: List[str]) -> Dict[str, Optional[str]]:
+@lru_cache(maxsize=128)
+def _suggest_mapping_tup(headers: Tuple[str, ...]) -> Dict[str, Optional[str]]:
     cols = [_norm(h) for h in headers]
     return {
-        "brand":   _match_one(cols, DEFAULT_PATTERNS["brand"]),
-        "chain":   _match_one(cols, DEFAULT_PATTERNS["chain"]),
-        "units":   _match_one(cols, DEFAULT_PATTERNS["units"]),
-        "dollars": _match_one(cols, DEFAULT_PATTERNS["dollars"]),
-        "stores":  _match_one(cols, DEFAULT_PATTERNS["stores"]),
-        "acv":     _match_one(cols, DEFAULT_PATTERNS["acv"]),
+        "brand":   _match_one(cols, DEFAULT_PATTERNS["brand"], COMBINED_PATTERNS["brand"]),
+        "chain":   _match_one(cols, DEFAULT_PATTERNS["chain"], COMBINED_PATTERNS["chain"]),
+        "units":   _match_one(cols, DEFAULT_PATTERNS["units"], COMBINED_PATTERNS["units"]),
+        "dollars": _match_one(cols, DEFAULT_PATTERNS["dollars"], COMBINED_PATTERNS["dollars"]),
+        "stores":  _match_one(cols, DEFAULT_PATTERNS["stores"], COMBINED_PATTERNS["stores"]),
+        "acv":     _match_one(cols, DEFAULT_PATTERNS["acv"], COMBINED_PATTERNS["acv"]),
     }
 
-def profile_key(file_name: str, sheet_name: str, headers: List[str]) -> str:
+def suggest_mapping(headers: List[str]) -> Dict[str, Optional[str]]:
+    # Streamlit reruns hand us the same headers on every widget change; the copy
+    # keeps callers from mutating the cached result.
+    return dict(_suggest_mapping_tup(tuple(headers)))
+
+@lru_cache(maxsize=128)
+def _profile_key_tup(file_name: str, sheet_name: str, headers: Tuple[str, ...]) -> str:
     base = os.path.splitext(os.path.basename(file_name))[0]
-    sig = "|".join([_norm(h) for h in headers[:30]])  # header fingerprint
-    raw = f"{base}::{sheet_name}::{sig}"
-    return _sha1_name(raw)
+    # Feed the digest incrementally; bytes are identical to sha1("base::sheet::h1|h2|...")
+    # so keys already saved in column_profiles.json stay valid.
+    h = hashlib.sha1(f"{base}::{sheet_name}::".encode("utf-8"))
+    for i, hdr in enumerate(headers):  # header fingerprint
+        if i:
+            h.update(b"|")
+        h.update(_norm(hdr).encode("utf-8"))
+    return h.hexdigest()
+
+def profile_key(file_name: str, sheet_name: str, headers: List[str]) -> str:
+    # Only the first 30 headers feed the fingerprint, so slice before caching.
+    return _profile_key_tup(file_name, sheet_name, tuple(headers[:30]))
 
 def get_saved_mapping(key: str) -> Optional[Dict[str, str]]:
     prof = load_profiles()
     return prof.get(key)
 
 def save_mapping(key: str, mapping: Dict[str, str]) -> None:
-    prof = load_profiles()
+    prof = dict(load_profiles())
     prof[key] = mapping
     save_profiles(prof)
@@ -1,9 +1,24 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DB_PATH = os.getenv("SPINS_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "spins.db"))
 DB_URL = f"sqlite:///{os.path.abspath(DB_PATH)}"
 engine = create_engine(DB_URL, connect_args={"check_same_thread": False})
+
+# Opt-in: journal_mode=WAL is persisted in the file header, so enabling it
+# unconditionally would rewrite the tracked spins.db on the first read
+USE_WAL = os.getenv("SPINS_DB_WAL", "").lower() in ("1", "true", "yes")
+
+@event.listens_for(engine, "connect")
+def _sqlite_pragmas(dbapi_conn, _record):
+    # WAL lets the dashboard read while an ingest commits; NORMAL sync is safe under WAL
+    if not USE_WAL:
+        return
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 Base = declarative_base()
@@ -4,6 +4,7 @@ import math
 from pathlib import Path
 from typing import Optional, Tuple, List
 
+import numpy as np
 import pandas as pd
 
 DATA_DIR = Path("data")
@@ -33,28 +34,20 @@ def _find_header_block(raw: pd.DataFrame, max_scan: int = 200) -> Optional[Tuple
     Find the header block: scan for a row that contains 'Row Labels' (case-insensitive).
     Use that as the *end* of header; include up to 3 rows above to capture period labels.
     """
-    upto = min(max_scan, len(raw))
-    end_hdr = None
-    for i in range(upto):
-        row = raw.iloc[i].astype(str).str.strip().str.lower()
-        if any("row labels" in c for c in row):
-            end_hdr = i
-            break
-    if end_hdr is None:
+    arr = np.char.lower(raw.iloc[:max_scan].fillna("").astype(str).to_numpy(dtype=str))
+    hits = (np.char.find(arr, "row labels") >= 0).any(axis=1)
+    if not hits.any():
         return None
+    end_hdr = int(np.argmax(hits))
     start_hdr = max(0, end_hdr - 3)
     data_start = end_hdr + 1
     return (start_hdr, end_hdr, data_start)
 
 def _combine_headers(raw: pd.DataFrame, start_hdr: int, end_hdr: int) -> List[str]:
-    blk = raw.iloc[start_hdr:end_hdr+1].copy()
-    blk = blk.fillna("").astype(str)
-    headers: List[str] = []
-    for c in range(blk.shape[1]):
-        tokens = [_norm_cell(v) for v in blk.iloc[:, c].tolist()]
-        tokens = [t for t in tokens if t]
-        headers.append(" | ".join(tokens) if tokens else "")
-    return headers
+    arr = np.char.strip(raw.iloc[start_hdr:end_hdr+1].fillna("").astype(str).to_numpy(dtype=str))
+    # same rules as _norm_cell, applied to the whole block at once
+    arr[np.char.startswith(np.char.lower(arr), "unnamed")] = ""
+    return [" | ".join(t for t in arr[:, c] if t) for c in range(arr.shape[1])]
 
 def _guess_period_from_block(raw: pd.DataFrame, start_hdr: int, end_hdr: int) -> str:
     """
@@ -77,12 +70,11 @@ def _first_match(colnames: List[str], *needles: str) -> Optional[str]:
     Return the first column whose name contains ALL needle fragments (case-insensitive).
     Each needle is matched as 'in string'.
     """
-    needles = [n.lower() for n in needles]
-    for c in colnames:
-        lc = c.lower()
-        if all(n in lc for n in needles):
-            return c
-    return None
+    idx_low = pd.Index(colnames, dtype=object).str.lower()
+    m = idx_low.str.contains(needles[0].lower(), regex=False, na=False)
+    for n in needles[1:]:
+        m &= idx_low.str.contains(n.lower(), regex=False, na=False)
+    return colnames[m.argmax()] if m.any() else None
 
 def _find_columns(cols: List[str]) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
     """
@@ -116,11 +108,18 @@ def _find_columns(cols: List[str]) -> Tuple[Optional[str], Optional[str], Option
 # ----------------- main ingest -----------------
 
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Optional, Tuple, List
 
 import pandas as pd
 
+# Compiled once; these run for every sheet/file ingested
+_RE_ENDING = re.compile(r"ending\s+(\d{2})-(\d{2})-(\d{2})")
+_RE_4W = re.compile(r"\b4\s*w(ee)?ks?\b|\b4wk\b|\b4 wks\b", re.I)
+_RE_52W = re.compile(r"\b52\s*w(ee)?ks?\b|\b52wk\b|\b52 wks\b", re.I)
+_RE_YTD = re.compile(r"\bytd\b|\byear to date\b", re.I)
+
 
 # ---------------------------------
 # tiny helpers
@@ -133,7 +132,7 @@ def _parse_dates_from_name(name: str) -> Tuple[Optional[str], Optional[str]]:
     Parses '... Ending MM-DD-YY' from filename. Returns (report_date, report_month)
     as 'YYYY-MM-DD' and 'YYYY-MM-01'. If not found, (None, None).
     """
-    m = re.search(r"ending\s+(\d{2})-(\d{2})-(\d{2})", name.lower())
+    m = _RE_ENDING.search(name.lower())
     if not m:
         return None, None
     mm, dd, yy = m.groups()
@@ -144,26 +143,70 @@ def _find_header_row(raw: pd.DataFrame, max_scan: int = 200) -> Optional[int]:
     """
     Scan the first rows to locate the header row that includes 'Row Labels'.
     """
-    for i in range(min(max_scan, len(raw))):
-        row = raw.iloc[i].astype(str).str.strip().str.lower()
-        if any("row labels" in c for c in row):
-            return i
-    return None
+    arr = np.char.lower(raw.iloc[:max_scan].fillna("").astype(str).to_numpy(dtype=str))
+    hits = (np.char.find(arr, "row labels") >= 0).any(axis=1)
+    return int(np.argmax(hits)) if hits.any() else None
+
+def _peek_sheet(xls: pd.ExcelFile, sheet: str, engine: Optional[str], nrows: int = 200) -> pd.DataFrame:
+    """
+    Read only the top of a sheet (no headers) so header detection doesn't parse every data row.
+    """
+    return pd.read_excel(xls, sheet_name=sheet, engine=engine, header=None, nrows=nrows)
+
+def _xlsb_cell(v):
+    # Same conversion as pandas' pyxlsb reader: empty -> "", integral floats -> int
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+def _stream_xlsb_sheet(path: Path, sheet: str, max_scan: int = 200) -> Optional[Tuple[pd.DataFrame, int, pd.DataFrame]]:
+    """
+    Single pass over an .xlsb sheet with pyxlsb: find the 'Row Labels' header row within the
+    first `max_scan` rows, then collect the data rows and build the DataFrame once.
+    Returns (rows up to and including the header, header_row, data) or None if no header.
+    """
+    from pyxlsb import open_workbook
+
+    top: List[list] = []
+    headers: Optional[List[str]] = None
+    rows: List[list] = []
+    with open_workbook(str(path)) as wb:
+        with wb.get_sheet(sheet) as ws:
+            for i, row in enumerate(ws.rows()):
+                cells = [_xlsb_cell(c.v) for c in row]
+                if headers is not None:
+                    # rows() pads out to the sheet dimension, so skip blank rows as read_excel does
+                    if any(v != "" for v in cells):
+                        rows.append(cells)
+                    continue
+                if i >= max_scan:
+                    return None
+                top.append(cells)
+                if any("row labels" in str(v).strip().lower() for v in cells):
+                    headers = [str(v).strip() for v in cells]
+    if headers is None:
+        return None
+
+    width = len(headers)
+    rows = [(r + [""] * (width - len(r)))[:width] for r in rows]
+    return pd.DataFrame(top), len(top) - 1, pd.DataFrame(rows, columns=headers)
 
 def _guess_period_from_meta(raw: pd.DataFrame, header_row: int) -> str:
     """
     Look above the header for text that looks like '4 Wks', '52 Wks', 'YTD', etc.
     Returns one of {'4W','52W','YTD','unknown'}
     """
-    window = raw.iloc[max(0, header_row-12):header_row].astype(str).apply(lambda s: s.str.lower())
-    flat = " | ".join([" | ".join(r.values.tolist()) for _, r in window.iterrows()])
+    window = raw.iloc[max(0, header_row-12):header_row].fillna("").astype(str)
+    flat = " | ".join(window.values.ravel().tolist()).lower()
 
     # very lenient regexes
-    if re.search(r"\b4\s*w(ee)?ks?\b|\b4wk\b|\b4 wks\b", flat):
+    if _RE_4W.search(flat):
         return "4W"
-    if re.search(r"\b52\s*w(ee)?ks?\b|\b52wk\b|\b52 wks\b", flat):
+    if _RE_52W.search(flat):
         return "52W"
-    if re.search(r"\bytd\b|\byear to date\b", flat):
+    if _RE_YTD.search(flat):
         return "YTD"
     return "unknown"
 
@@ -172,12 +215,11 @@ def _choose_col(cols: List[str], *patterns: str) -> Optional[str]:
     Find a column whose name matches any of the given regex patterns (case-insensitive).
     Returns the first match, or None if not found.
     """
-    low = {c.lower(): c for c in cols}
+    idx_low = pd.Index(cols, dtype=object).str.lower()
     for pat in patterns:
-        rgx = re.compile(pat, re.I)
-        for lc, orig in low.items():
-            if rgx.search(lc):
-                return orig
+        m = idx_low.str.contains(pat, regex=True, na=False)
+        if m.any():
+            return cols[m.argmax()]
     return None
 
 
@@ -209,23 +251,26 @@ def ingest_single_period(file_path: Path) -> pd.DataFrame:
 
     out_rows = []
     for sh in candidate_sheets:
-        raw = pd.read_excel(xls, sheet_name=sh, engine=engine, header=None)
-        header_row = _find_header_row(raw)
-        if header_row is None:
-            continue
+        if engine == "pyxlsb":
+            streamed = _stream_xlsb_sheet(file_path, sh)
+            if streamed is None:
+                continue
+            raw, header_row, data = streamed
+        else:
+            raw = _peek_sheet(xls, sh, engine)
+            header_row = _find_header_row(raw)
+            if header_row is None:
+                continue
 
-        # Build headers from the header row only (robust, avoids multi-row noise)
-        headers = raw.iloc[header_row].astype(str).str.strip()
-        data = raw.iloc[header_row+1:].copy()
-        data.columns = headers
+            # Build headers from the header row only (robust, avoids multi-row noise);
+            # the full sheet is only parsed once we know it has a usable header.
+            data = pd.read_excel(xls, sheet_name=sh, engine=engine, skiprows=header_row, header=0)
+            data.columns = data.columns.astype(str).str.strip()
 
         # Drop totally empty/unnamed columns
-        keep_cols = []
-        for c in data.columns:
-            cs = str(c).strip()
-            if cs and not cs.lower().startswith("unnamed"):
-                keep_cols.append(c)
-        data = data.loc[:, keep_cols].reset_index(drop=True)
+        idx = data.columns
+        mask = (idx != "") & ~idx.str.lower().str.startswith("unnamed")
+        data = data.loc[:, mask].reset_index(drop=True)
 
         cols = list(map(str, data.columns))
 
@@ -233,10 +278,10 @@ def ingest_single_period(file_path: Path) -> pd.DataFrame:
         chain_col = _choose_col(
             cols,
             r"^row labels$",
-            r"\b(retailer|chain)\b"
+            r"\b(?:retailer|chain)\b"
         )
-        units_col = _choose_col(cols, r"\b(sum of )?units\b")
-        dollars_col = _choose_col(cols, r"\b(sum of )?dollars?\b|\brevenue\b|\bnet sales\b")
+        units_col = _choose_col(cols, r"\b(?:sum of )?units\b")
+        dollars_col = _choose_col(cols, r"\b(?:sum of )?dollars?\b|\brevenue\b|\bnet sales\b")
         # Prefer the EXACT SPINS calc column for store count (your Column X remark)
         stores_col = _choose_col(
             cols,
@@ -251,7 +296,7 @@ def ingest_single_period(file_path: Path) -> pd.DataFrame:
             continue
 
         # Clean/filter the table
-        df = data[[chain_col, units_col, dollars_col, stores_col]].copy()
+        df = data[[chain_col, units_col, dollars_col, stores_col]]
         df = df.rename(columns={
 # --- map columns robustly
 chain_col   = _pick_col(df.columns, r"\brow labels\b", r"\bretailer\b", r"\bchain\b")
@@ -320,6 +365,10 @@ else:
         period = _guess_period_from_meta(raw, header_row)
         df["period"] = period
 
+        # Low-cardinality labels: dictionary-encode them
+        for c in ("chain", "brand", "period"):
+            df[c] = df[c].astype("category")
+
         out_rows.append(df)
 
         # Stop at first usable sheet (these workbooks usually duplicate the same table in a few sheets)
@@ -352,20 +401,35 @@ def ingest_all_singleperiod(files: List[Path]) -> pd.DataFrame:
     if not frames:
         return pd.DataFrame(columns=["chain","units","dollars","stores","brand","report_date","report_month","period","source_file"])
     return pd.concat(frames, ignore_index=True)
+def _ingest_one(p: Path) -> Tuple[pd.DataFrame, Optional[str]]:
+    # Top-level so it pickles into worker processes; errors come back as text.
+    try:
+        return ingest_single_period(p), None
+    except Exception as e:
+        return pd.DataFrame(), str(e)
+
 def ingest_many(paths: List[Path]) -> pd.DataFrame:
     frames = []
-    for p in paths:
-        try:
-            df = ingest_single_period(p)
-        except Exception as e:
-            print(f"Error reading {p.name}: {e}")
-            df = pd.DataFrame()
+    if len(paths) > 1:
+        # Files are independent and parsing is CPU-bound, so fan out across processes
+        with ProcessPoolExecutor() as ex:
+            results = list(ex.map(_ingest_one, paths))
+    else:
+        results = [_ingest_one(p) for p in paths]
+    for p, (df, err) in zip(paths, results):
+        if err is not None:
+            print(f"Error reading {p.name}: {err}")
         if len(df):
+            df["source_file"] = p.name
             frames.append(df)
         else:
             print(f"Skipped {p.name}: no usable table found")
     if frames:
-        return pd.concat(frames, ignore_index=True)
+        out = pd.concat(frames, ignore_index=True)
+        # concat falls back to object when per-file categories differ; re-encode once
+        for c in ("chain", "brand", "period", "source_file"):
+            out[c] = out[c].astype("category")
+        return out
     return pd.DataFrame()
 
 if __name__ == "__main__":
@@ -378,7 +442,10 @@ if __name__ == "__main__":
         all_df = ingest_many(files)
         print(f"Ingested rows: {len(all_df)}")
         if len(all_df):
-            out_csv = DATA_DIR / "neolea_spins_singleperiod.csv"
-            all_df.to_csv(out_csv, index=False)
-            print(f"Saved: {out_csv}")
+            # Parquet keeps dtypes, so the dashboard doesn't re-parse numbers/dates on load
+            for c in ("report_date", "report_month"):
+                all_df[c] = pd.to_datetime(all_df[c], errors="coerce")
+            out_parquet = DATA_DIR / "neolea_spins_singleperiod.parquet"
+            all_df.to_parquet(out_parquet, index=False)
+            print(f"Saved: {out_parquet}")
             print(all_df.head(10).to_string(index=False))
@@ -0,0 +1,13 @@
+import numpy as np
+import pandas as pd
+
+
+def relabel(s: pd.Series, fn) -> pd.Series:
+    """Apply fn to each category label rather than each row; labels that collide are merged."""
+    s = s.astype("category")
+    new = [fn(str(c)) for c in s.cat.categories]
+    cats = sorted(set(new))
+    pos = {c: i for i, c in enumerate(cats)}
+    lookup = np.array([pos[n] for n in new] + [-1])  # trailing -1 keeps missing values missing
+    codes = lookup[s.cat.codes.to_numpy()]
+    return pd.Series(pd.Categorical.from_codes(codes, categories=cats), index=s.index, name=s.name)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, String, UniqueConstraint, ForeignKey, REAL
+from sqlalchemy import Column, Integer, Text, String, UniqueConstraint, ForeignKey, REAL, Index
 from .db import Base
 
 class Upload(Base):
@@ -36,4 +36,9 @@ class SpinsFact(Base):
 
     __table_args__ = (
         UniqueConstraint("report_month_id", "brand_id", "chain_id", name="uq_fact"),
+        # uq_fact already covers lookups by report_month_id (leftmost column).
+        # These two are only created with the table (create_all on a fresh DB); the
+        # committed spins.db predates them and there is no migration step.
+        Index("ix_fact_chain", "chain_id"),
+        Index("ix_fact_brand", "brand_id"),
     )
@@ -1,5 +1,5 @@
 import io
-import math
+import numpy as np
 import pandas as pd
 import streamlit as st
 from backend.columns import suggest_mapping, profile_key, save_mapping
@@ -40,33 +40,20 @@ start_hdr = st.number_input("Header start row (0-based)", min_value=0, max_value
 end_hdr   = st.number_input("Header end row (inclusive, 0-based)", min_value=start_hdr, max_value=max_row, value=start_hdr, step=1)
 data_start = st.number_input("First data row (0-based, typically end_hdr+1)", min_value=end_hdr+1, max_value=max_row, value=min(end_hdr+1, max_row), step=1)
 
-def norm_cell(x):
-    if x is None or (isinstance(x, float) and math.isnan(x)): return ""
-    s = str(x).strip()
-    if not s: return ""
-    if s.lower().startswith("unnamed"): return ""
-    return s
-
 # Build headers by concatenating the selected header rows for each column
 header_block = raw.iloc[int(start_hdr):int(end_hdr)+1]
-parts = header_block.fillna("").astype(str).applymap(norm_cell).values
-# transpose to work per column
-combined = []
-for col_idx in range(header_block.shape[1]):
-    tokens = [norm_cell(parts[r_idx][col_idx]) for r_idx in range(parts.shape[0])]
-    tokens = [t for t in tokens if t]  # drop empties
-    combined.append(" | ".join(tokens) if tokens else "")
+# Normalize every cell in one vectorized pass: strip, blank out "Unnamed: n" placeholders
+parts = np.char.strip(header_block.fillna("").astype(str).to_numpy(dtype=str))
+parts[np.char.startswith(np.char.lower(parts), "unnamed")] = ""
+# join the non-empty tokens per column
+combined = [" | ".join(t for t in parts[:, col_idx] if t) for col_idx in range(parts.shape[1])]
 
 # Create framed DataFrame with those headers; drop fully empty headers
 df = raw.iloc[int(data_start):].copy()
 df.columns = combined
-keep_cols = []
-for h in df.columns:
-    hh = (h or "").strip()
-    if not hh or hh.lower().startswith("unnamed"):
-        continue
-    keep_cols.append(h)
-df = df.loc[:, keep_cols].reset_index(drop=True)
+idx = pd.Index(df.columns, dtype=object).fillna("").astype(str).str.strip()
+keep = (idx != "") & ~idx.str.lower().str.startswith("unnamed")
+df = df.loc[:, keep].reset_index(drop=True)
 
 st.subheader("Detected headers after multi-row build")
 st.write(list(df.columns))
@@ -1,51 +1,84 @@
 # spins_dashboard.py — Verification-first dashboard (single-period, brand=NEOLEA)
 
 from pathlib import Path
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from backend.labels import relabel
+
 st.set_page_config(page_title="Neolea – SPINS Verifier", layout="wide")
 
-CSV_PATH = Path("data/neolea_spins_singleperiod.csv")
+PARQUET_PATH = Path("data/neolea_spins_singleperiod.parquet")
 
-# ---------- Load ----------
-if not CSV_PATH.exists():
-    st.error(f"Data file not found: {CSV_PATH}\nBuild it locally with:\n  python - <<'PY'\nfrom pathlib import Path\nimport pandas as pd\nfrom backend.ingest import ingest_single_period\nfiles = sorted(Path('data').glob('*.xlsb'))\nparts = []\nfor f in files:\n    d = ingest_single_period(f)\n    d['source_file'] = f.name\n    parts.append(d)\nif parts:\n    out = pd.concat(parts, ignore_index=True)\n    out.to_csv('data/neolea_spins_singleperiod.csv', index=False)\n    print('Wrote data/neolea_spins_singleperiod.csv rows:', len(out))\nelse:\n    print('No .xlsb files found under ./data')\nPY")
-    st.stop()
 
-df = pd.read_csv(CSV_PATH, dtype={"report_month": "string"}, low_memory=False)
+@st.cache_data(show_spinner=False)
+def load_data(path: str, mtime: float) -> pd.DataFrame:
+    # mtime is only part of the cache key, so a rebuilt file invalidates the cache
+    # Parquet is typed: numerics and report_month come back ready to use
+    df = pd.read_parquet(path)
+
+    # Normalize columns that should exist
+    expected = ["chain","units","dollars","stores","brand","report_date","report_month","period"]
+    for c in expected:
+        if c not in df.columns:
+            df[c] = pd.NA
+
+    # Types / cleaning
+    # Stored as read (float64): the table and debug pane must show the source values exactly
+    for c in ("units", "dollars", "stores"):
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    # Labels stay categorical and are cleaned per category, not per row
+    df["chain"] = relabel(df["chain"], str.strip)
+    df["period"] = relabel(df["period"], str.strip)
+    # Uppercase brand once here so brand checks are a plain codes compare
+    df["brand"] = relabel(df["brand"], lambda b: b.strip().upper())
+
+    # Filter to Neolea only
+    df = df[df["brand"] == "NEOLEA"]
+    # Drop labels only other brands used, so .cat.categories lists exactly what's present
+    return df.assign(**{c: df[c].cat.remove_unused_categories() for c in ("chain", "brand", "period")})
 
-# Normalize columns that should exist
-expected = ["chain","units","dollars","stores","brand","report_date","report_month","period"]
-for c in expected:
-    if c not in df.columns:
-        df[c] = pd.NA
 
-# Types / cleaning
-df["chain"] = df["chain"].astype(str).str.strip()
-df["brand"] = df["brand"].astype(str).str.strip()
-df["period"] = df["period"].astype(str).str.strip()
-if "report_month" in df:
-    df["report_month"] = pd.to_datetime(df["report_month"], errors="coerce")
+@st.cache_data(show_spinner=False)
+def retailer_options(path: str, mtime: float, period: str) -> list:
+    df = load_data(path, mtime)
+    # categories are already sorted; dropping the unused ones leaves this period's chains
+    return df.loc[df["period"] == period, "chain"].cat.remove_unused_categories().cat.categories.tolist()
+
+
+@st.cache_resource(show_spinner=False)
+def period_by_chain(path: str, mtime: float, period: str) -> pd.DataFrame:
+    # Sorted chain index, so a retailer selection is an index slice rather than an isin scan.
+    # cache_resource hands back the same frame instead of unpickling a copy per rerun;
+    # callers only slice it, never mutate it
+    df = load_data(path, mtime)
+    return df[df["period"] == period].set_index("chain").sort_index(kind="stable")
+
+
+# ---------- Load ----------
+if not PARQUET_PATH.exists():
+    st.error(f"Data file not found: {PARQUET_PATH}\nBuild it locally with:\n  python -m backend.ingest")
+    st.stop()
 
-# Filter to Neolea only
-df = df[df["brand"].str.upper() == "NEOLEA"].copy()
+data_mtime = PARQUET_PATH.stat().st_mtime
+df = load_data(str(PARQUET_PATH), data_mtime)
 
 # ---------- UI: pick ONE period then retailers ----------
 st.sidebar.header("Filters")
-periods = [p for p in sorted(df["period"].dropna().unique().tolist()) if p and p != "nan"]
+periods = [p for p in df["period"].cat.categories if p and p != "nan"]  # categories are sorted
 if not periods:
-    st.error("No period labels found in CSV. The ingest didn’t detect ‘4w’, ‘52w’ or ‘ytd’.")
+    st.error("No period labels found in the data file. The ingest didn’t detect ‘4w’, ‘52w’ or ‘ytd’.")
     st.stop()
 
 picked_period = st.sidebar.selectbox("Period", periods, index=0)
 
-dfp = df[df["period"] == picked_period].copy()
+dfp = df[df["period"] == picked_period]
 if len(dfp) == 0:
     st.warning(f"No rows for period: {picked_period}")
     st.stop()
 
-retailers = sorted(dfp["chain"].dropna().unique().tolist())
+retailers = retailer_options(str(PARQUET_PATH), data_mtime, picked_period)
 picked_retailers = st.sidebar.multiselect(
     "Retailers",
     options=retailers,
@@ -57,17 +90,26 @@ if not picked_retailers:
     st.info("Pick at least one retailer.")
     st.stop()
 
-dfv = dfp[dfp["chain"].isin(picked_retailers)].copy()
+by_chain = period_by_chain(str(PARQUET_PATH), data_mtime, picked_period)
+if len(picked_retailers) == len(retailers):
+    # Default selection is every retailer: nothing to slice
+    dfv = by_chain.reset_index()
+else:
+    known = set(retailers)
+    dfv = by_chain.loc[[r for r in picked_retailers if r in known]].reset_index()
 
 # ---------- KPIs ----------
 # Stores here are **per retailer** doors for the selected period. Summing across retailers
 # gives total doors across selected retailers (not store-weeks).
-total_units = pd.to_numeric(dfv["units"], errors="coerce").sum(skipna=True)
-total_dollars = pd.to_numeric(dfv["dollars"], errors="coerce").sum(skipna=True)
+# float32 copy for the reductions only: one block, one NaN-skipping pass
+# Column-major so each column reduced below is one unit-stride run (no copy if pandas
+# already handed back F order, which it does for a single consolidated block)
+kpi = np.asfortranarray(dfv[["units", "dollars", "stores"]].to_numpy(dtype=np.float32, na_value=np.nan))
+# accumulate in float64 so large dollar totals don't drift
+total_units, total_dollars, stores_sum = np.nansum(kpi, axis=0, dtype=np.float64)
 # Two ways to show "stores": sum across retailers, and median per retailer (sanity check)
-stores_series = pd.to_numeric(dfv["stores"], errors="coerce")
-stores_sum = stores_series.sum(skipna=True)
-stores_median = stores_series.median(skipna=True)
+stores = kpi[:, 2]
+stores_median = np.nanmedian(stores) if np.isfinite(stores).any() else np.nan
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Units (sum)", f"{int(round(total_units)):,}")
@@ -77,41 +119,52 @@ col4.metric("Stores per Retailer (median)", f"{stores_median:,.0f}" if pd.notna(
 
 st.caption(
     "Note: ‘Stores (sum of retailers)’ is the simple sum of each retailer’s **doors** in the selected period. "
-    "Doors should not be multiplied by weeks. If this sum looks too high, the CSV may contain store-weeks instead of doors."
+    "Doors should not be multiplied by weeks. If this sum looks too high, the data file may contain store-weeks instead of doors."
 )
 
 # ---------- Table ----------
 show_cols = ["chain","units","dollars","stores","period","report_date","report_month"]
 show_cols = [c for c in show_cols if c in dfv.columns]
-st.dataframe(dfv[show_cols].sort_values("chain"), use_container_width=True)
+st.dataframe(dfv[show_cols].sort_values("chain", kind="stable"), use_container_width=True, key="retailer_table")
 
 # ---------- Debug / Verification ----------
-with st.expander("🔎 Debug / Verify what the app is reading", expanded=False):
-    st.write("**CSV path:**", str(CSV_PATH))
-    st.write("**Columns present:**", list(df.columns))
-    st.write("**Dtypes:**")
-    st.write(df.dtypes.astype(str).to_dict())
-
-    st.write("**Unique periods in CSV:**", sorted([p for p in df["period"].dropna().unique().tolist() if p and p != "nan"]))
-    st.write("**Unique chains (this period):**", retailers)
-
-    st.write("**First 15 rows for this period (Neolea only):**")
-    st.dataframe(dfp.head(15), use_container_width=True)
-
-    # Fresh Market sanity check
-    fm = dfp[dfp["chain"].str.contains("FRESH MARKET", case=False, na=False)].copy()
-    if len(fm):
-        st.subheader("The Fresh Market rows (selected period)")
-        st.dataframe(fm[show_cols], use_container_width=True)
-        fm_stores = pd.to_numeric(fm["stores"], errors="coerce")
-        st.write("Fresh Market stores values:", fm_stores.tolist())
-        # warn if clearly store-weeks
-        if fm_stores.max() and fm_stores.max() > 300:
-            st.error(
-                "⚠️ The Fresh Market `stores` value is > 300. That looks like **store-weeks**, not doors. "
-                "We need to adjust the ingest to use the **‘# of Stores Selling’** column from the Retailer tab (Column X)."
-            )
-    else:
-        st.write("No Fresh Market row found for this period in the CSV.")
-
-st.success("Loaded CSV and filtered to Neolea. Pick a period and retailers in the sidebar.")
+@st.fragment
+def render_debug(df: pd.DataFrame, dfp: pd.DataFrame, periods: list, retailers: list, show_cols: list) -> None:
+    # A fragment: flipping the toggle reruns only this function, and while it's off
+    # none of the checks below run. (Fragments can't own sidebar widgets, hence inline.)
+    if not st.toggle("🔎 Debug / Verify what the app is reading", value=False, key="debug_open"):
+        return
+    with st.container(border=True):
+        st.write("**Data path:**", str(PARQUET_PATH))
+        st.write("**Columns present:**", list(df.columns))
+        st.write("**Dtypes:**")
+        st.write({c: str(t) for c, t in zip(df.columns, df.dtypes)})
+
+        st.write("**Unique periods in data file:**", periods)
+        st.write("**Unique chains (this period):**", retailers)
+
+        st.write("**First 15 rows for this period (Neolea only):**")
+        st.dataframe(dfp.head(15)[show_cols], use_container_width=True, hide_index=True, key="debug_head")
+
+        # Fresh Market sanity check
+        # match against the category labels once, then select rows by label membership
+        cats = dfp["chain"].cat.categories
+        fm = dfp[dfp["chain"].isin(cats[cats.str.contains("FRESH MARKET", case=False, na=False)])]
+        if len(fm):
+            st.subheader("The Fresh Market rows (selected period)")
+            st.dataframe(fm[show_cols], use_container_width=True, hide_index=True, key="debug_fresh_market")
+            fm_stores = fm["stores"]
+            st.write("Fresh Market stores values:", fm_stores.tolist())
+            # warn if clearly store-weeks
+            if fm_stores.max() and fm_stores.max() > 300:
+                st.error(
+                    "⚠️ The Fresh Market `stores` value is > 300. That looks like **store-weeks**, not doors. "
+                    "We need to adjust the ingest to use the **‘# of Stores Selling’** column from the Retailer tab (Column X)."
+                )
+        else:
+            st.write("No Fresh Market row found for this period in the data file.")
+
+
+render_debug(df, dfp, periods, retailers, show_cols)
+
+st.success("Loaded data file and filtered to Neolea. Pick a period and retailers in the sidebar.")